@@ -0,0 +1,86 @@
+"""
+Arranque liviano de los workers del pool.
+    - El pool usa el método forkserver con precarga: el servidor importa una sola vez pandas, psycopg2
+      y el script principal (que a su vez importa utils y carga los operadores desde la BD), y cada
+      worker nace como un fork de ese proceso ya inicializado.
+    - El catálogo compilado (criterios + rangos) se serializa una vez a un archivo que cada worker
+      carga una sola vez al iniciar (copia propia por worker), en lugar de viajar serializado con cada submit.
+    - Se mide el tiempo desde la creación del pool hasta la primera fila evaluada en cada worker.
+"""
+
+import logging
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+MODULOS_PRECARGA = ["__main__", "numpy", "pandas", "psycopg2", "psycopg2.extras"]
+
+_CATALOGO = None
+_T_POOL = None
+_ARRANQUE_S = None
+_ARRANQUE_REPORTADO = False
+
+def publicar_catalogo(catalogo):
+    """Serializa el catálogo a un archivo temporal de solo lectura y devuelve su ruta."""
+    descriptor, ruta = tempfile.mkstemp(prefix="catalogo_criterios_", suffix=".pkl")
+    with os.fdopen(descriptor, "wb") as f:
+        pickle.dump(catalogo, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.chmod(ruta, 0o400)
+    return ruta
+
+def inicializar_worker(ruta_catalogo, t_pool):
+    """Initializer del pool: carga el archivo del catálogo y guarda el instante de creación del pool."""
+    global _CATALOGO, _T_POOL
+    _T_POOL = t_pool
+    if ruta_catalogo:
+        with open(ruta_catalogo, "rb") as f:
+            _CATALOGO = pickle.load(f)
+
+def obtener_catalogo():
+    """Devuelve el catálogo cargado por el worker, o None si el pool no lo publicó."""
+    return _CATALOGO
+
+def marcar_primera_fila():
+    """Registra el tiempo desde la creación del pool hasta la primera fila evaluada del worker."""
+    global _ARRANQUE_S
+    if _ARRANQUE_S is None and _T_POOL is not None:
+        _ARRANQUE_S = time.time() - _T_POOL
+
+def tomar_arranque():
+    """Devuelve el tiempo de arranque del worker la primera vez que se consulta; después None."""
+    global _ARRANQUE_REPORTADO
+    if _ARRANQUE_S is None or _ARRANQUE_REPORTADO:
+        return None
+    _ARRANQUE_REPORTADO = True
+    return _ARRANQUE_S
+
+def crear_pool(max_procesos, metodo_inicio, ruta_catalogo=None):
+    """
+    Crea el ProcessPoolExecutor con el método de inicio indicado (forkserver con precarga si está
+    disponible) y el initializer que carga el archivo del catálogo.
+    """
+    contexto = None
+    if metodo_inicio in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context(metodo_inicio)
+        if metodo_inicio == "forkserver":
+            contexto.set_forkserver_preload(MODULOS_PRECARGA)
+    else:
+        logging.warning(f"Método de inicio {metodo_inicio} no disponible; se usa el predeterminado")
+    return ProcessPoolExecutor(
+        max_workers=max_procesos,
+        mp_context=contexto,
+        initializer=inicializar_worker,
+        initargs=(ruta_catalogo, time.time()),
+    )
+
+def resumir_arranques(arranques):
+    """Devuelve cadena con el tiempo de arranque (creación del pool -> primera fila) por worker."""
+    if not arranques:
+        return "workers=0"
+    return (
+        f"workers={len(arranques)}, min={min(arranques):.2f}s, "
+        f"media={sum(arranques) / len(arranques):.2f}s, max={max(arranques):.2f}s"
+    )
@@ -0,0 +1,76 @@
+"""
+Reutilización de resultados de criterios para snapshots repetidos.
+    - En temporalidades altas la mayoría de los snapshots de 5 minutos con la vela abierta repiten
+      los valores de indicadores del snapshot anterior; el resultado del criterio es el mismo.
+    - Por cada (ticker, timeframe) se comparan de forma vectorizada (shift) los campos de entrada del
+      criterio (parametros_relevantes) con el snapshot anterior; solo las filas que cambian se evalúan
+      y la decisión se arrastra a las siguientes filas sin cambio.
+    - Las filas reutilizadas / evaluadas se acumulan por timeframe para poder reportar el ahorro.
+"""
+
+from collections import defaultdict
+
+COLUMNAS_GRUPO = ["ticker", "timeframe"]
+
+def campos_entrada_criterio(criterio):
+    """
+    Devuelve la lista de campos de la fila de los que depende el resultado del criterio,
+    o None si no se pueden determinar (el criterio no se reutiliza).
+    Para umbral_dinamico se incluyen los nombres referenciados por la fórmula del umbral.
+    """
+    params = [x.strip() for x in (criterio.get("parametros_relevantes") or "").split(";")]
+    if criterio.get("tipo_criterio") == "umbral_dinamico":
+        if len(params) != 2:
+            return None
+        try:
+            nombres = compile(params[1], "<umbral_dinamico>", "eval").co_names
+        except SyntaxError:
+            return None
+        return [params[0]] + sorted(set(nombres))
+    return params
+
+def filas_con_cambio(df, campos):
+    """
+    Máscara (array booleano) de las filas cuyo vector de entrada difiere del snapshot anterior del mismo
+    (ticker, timeframe). La primera fila de cada grupo siempre cuenta como cambio; NULL == NULL.
+    Los campos que no existen en el frame se ignoran (valen None en todas las filas).
+    """
+    grupos = df.groupby(COLUMNAS_GRUPO, sort=False, dropna=False)
+    cambio = (grupos.cumcount() == 0).to_numpy()
+    campos = [campo for campo in campos if campo in df.columns]
+    if not campos:
+        return cambio
+    actual = df[campos]
+    previa = grupos[campos].shift()
+    iguales = (actual == previa) | (actual.isna() & previa.isna())
+    return cambio | ~iguales.all(axis=1).to_numpy()
+
+def origen_por_fila(df, cambio, posiciones):
+    """Para cada fila, la posición de la última fila con cambio de su mismo (ticker, timeframe)."""
+    origen = df[COLUMNAS_GRUPO].copy()
+    origen["origen"] = posiciones.where(cambio)
+    return origen.groupby(COLUMNAS_GRUPO, sort=False, dropna=False)["origen"].ffill().to_numpy().astype(int)
+
+class EstadisticasReuso:
+    """Filas reutilizadas (aciertos) y evaluadas (fallos) por timeframe."""
+
+    def __init__(self):
+        self.aciertos = defaultdict(int)
+        self.fallos = defaultdict(int)
+
+    def registrar(self, timeframe, aciertos, fallos):
+        self.aciertos[str(timeframe)] += int(aciertos)
+        self.fallos[str(timeframe)] += int(fallos)
+
+    def estadisticas(self):
+        """Devuelve {timeframe: [aciertos, fallos]}."""
+        timeframes = set(self.aciertos) | set(self.fallos)
+        return {tf: [self.aciertos[tf], self.fallos[tf]] for tf in timeframes}
+
+def combinar_estadisticas(acumulado, estadisticas):
+    """Suma en acumulado ({timeframe: [aciertos, fallos]}) las estadísticas de un shard."""
+    for timeframe, (aciertos, fallos) in estadisticas.items():
+        total = acumulado.setdefault(timeframe, [0, 0])
+        total[0] += aciertos
+        total[1] += fallos
+    return acumulado
@@ -28,3 +28,30 @@ RANGO_FECHAS = {
 
 N_PROCESOS = 3        # Número de procesos simultáneos para multiproceso
 CHUNK_SIZE = 5000     # No implementado en lectura por lotes pero disponible para futuros ajustes
+
+# Perfilado de workers (modo --profile)
+PERFIL_TASA_MUESTREO = float(os.getenv("PERFIL_TASA_MUESTREO", "1.0"))  # Fracción de tickers perfilados
+PERFIL_DIR = os.getenv("PERFIL_DIR", "perfiles")                          # Directorio de salida de los .prof
+
+# Supresión de duplicados antes del INSERT (claves existentes cargadas por paquete ticker/día)
+SUPRIMIR_DUPLICADOS = os.getenv("SUPRIMIR_DUPLICADOS", "1") == "1"
+
+# Modo por lotes (--batch): agrupación de tickers pequeños
+LOTE_MAX_FILAS = 20000    # Filas máximas por lote y por periodo (consulta); un ticker con más filas por periodo conserva su propio shard
+LOTE_MAX_TICKERS = 50     # Tickers máximos por lote (límite del ticker = ANY(%s))
+LOTE_PERIODO_DIAS = 1     # Días de indicadores cargados por consulta (1 = día, 7 = semana)
+
+# Reutilización de resultados de criterios para snapshots sin cambio en sus valores de entrada (ver cache_criterios)
+CACHE_CRITERIOS_ACTIVO = os.getenv("CACHE_CRITERIOS_ACTIVO", "1") == "1"
+
+# Copia local de indicadores reutilizada por el modo what-if
+CACHE_INDICADORES_DIR = os.getenv("CACHE_INDICADORES_DIR", "cache_indicadores")
+CACHE_INDICADORES_TTL_HORAS = 24  # Antigüedad máxima de la copia local antes de volver a consultar la BD
+
+# Escritor de alertas: commit al llegar a N alertas o T segundos, lo que ocurra primero
+ESCRITOR_FLUSH_ALERTAS = 20000
+ESCRITOR_FLUSH_SEGUNDOS = 30
+ESCRITOR_COMMIT_ASINCRONO = os.getenv("ESCRITOR_COMMIT_ASINCRONO", "0") == "1"  # synchronous_commit = off (backfills)
+
+# Método de inicio del pool de workers ("forkserver" con precarga de módulos; "fork" o "spawn" como alternativa)
+POOL_METODO_INICIO = os.getenv("POOL_METODO_INICIO", "forkserver")
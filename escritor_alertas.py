@@ -0,0 +1,107 @@
+"""
+Escritor de alertas con commits adaptativos.
+    - Acumula las alertas de varios paquetes en una sola transacción y hace commit al llegar a
+      flush_alertas alertas o al pasar flush_segundos desde el último commit, lo que ocurra primero.
+    - Un paquete grande se divide en bloques de flush_alertas (un commit por bloque), pero el punto de
+      control solo avanza cuando un paquete queda confirmado completo, de modo que reanudar desde él
+      empieza siempre en el límite de un paquete.
+    - Opcionalmente desactiva synchronous_commit en la sesión (cargas históricas).
+    - Registra la latencia de cada commit para reportar estadísticas.
+"""
+
+import logging
+import time
+import psycopg2.extras
+from db_connect import get_connection
+
+class EscritorAlertas:
+    """Escritor con conexión persistente y commits por tamaño o tiempo."""
+
+    def __init__(self, query, flush_alertas, flush_segundos, commit_asincrono=False, etiqueta=""):
+        self.query = query
+        self.flush_alertas = flush_alertas
+        self.flush_segundos = flush_segundos
+        self.etiqueta = etiqueta
+        self.conn = get_connection()
+        if commit_asincrono:
+            with self.conn.cursor() as cur:
+                cur.execute("SET synchronous_commit = off")
+            self.conn.commit()
+        self.pendientes = []
+        self.punto_pendiente = None
+        self.punto_confirmado = None
+        self.t_ultimo_commit = time.monotonic()
+        self.latencias_commit = []
+
+    def agregar(self, alertas, punto_control):
+        """
+        Agrega las alertas de un paquete completo. punto_control identifica el paquete
+        (p.ej. su fecha) y pasa a ser el punto de reanudación cuando todo el paquete queda confirmado.
+        Un paquete grande se escribe en bloques de flush_alertas con un commit por bloque; reejecutar
+        un paquete escrito a medias es seguro por el ON CONFLICT DO NOTHING.
+        """
+        previas = len(self.pendientes)
+        self.pendientes.extend(alertas)
+        escritas = 0
+        while len(self.pendientes) >= self.flush_alertas:
+            bloque = self.pendientes[:self.flush_alertas]
+            self.pendientes = self.pendientes[self.flush_alertas:]
+            escritas += len(bloque)
+            # El bloque completa el paquete anterior si cubre todas sus alertas pendientes
+            self._escribir(bloque, self.punto_pendiente if escritas >= previas else self.punto_confirmado)
+        self.punto_pendiente = punto_control
+        if not self.pendientes or time.monotonic() - self.t_ultimo_commit >= self.flush_segundos:
+            self.flush()
+
+    def flush(self):
+        """Escribe las alertas pendientes, hace commit y confirma el último paquete agregado."""
+        if self.pendientes:
+            self._escribir(self.pendientes, self.punto_pendiente)
+            self.pendientes = []
+        self.punto_confirmado = self.punto_pendiente
+        self.t_ultimo_commit = time.monotonic()
+
+    def _escribir(self, alertas, punto_control):
+        """
+        Inserta un bloque de alertas y hace commit, registrando la latencia del commit.
+        punto_control es el punto de reanudación que queda confirmado con este commit.
+        """
+        with self.conn.cursor() as cur:
+            psycopg2.extras.execute_values(cur, self.query, alertas, page_size=1000)
+        t0 = time.perf_counter()
+        self.conn.commit()
+        self.latencias_commit.append(time.perf_counter() - t0)
+        self.t_ultimo_commit = time.monotonic()
+        self.punto_confirmado = punto_control
+        logging.info(f"--- COMMIT {self.etiqueta}: alertas={len(alertas)}, punto de reanudación={self.punto_confirmado} ---")
+
+    def cerrar(self, error=False):
+        """Hace el último commit (o rollback si hubo error) y cierra la conexión."""
+        try:
+            if error:
+                self.conn.rollback()
+                logging.error(f"Escritura interrumpida {self.etiqueta}: reanudar después de {self.punto_confirmado}")
+            else:
+                self.flush()
+        finally:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_exc, exc, tb):
+        self.cerrar(error=tipo_exc is not None)
+        return False
+
+def resumir_latencias(latencias):
+    """Devuelve cadena con número de commits y latencia media, p50, p95 y máxima en ms."""
+    if not latencias:
+        return "commits=0"
+    ordenadas = sorted(latencias)
+    def percentil(p):
+        return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))] * 1000
+    media = sum(ordenadas) / len(ordenadas) * 1000
+    return (
+        f"commits={len(ordenadas)}, media={media:.1f}ms, p50={percentil(0.50):.1f}ms, "
+        f"p95={percentil(0.95):.1f}ms, max={ordenadas[-1] * 1000:.1f}ms"
+    )
@@ -10,13 +10,34 @@ DESCRIPCIÓN:
     - El campo is_closed es propagado a la tabla de alertas_generadas.
 """
 
+import argparse
 import logging
+import math
+import os
+import re
+import time
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from config import RANGO_FECHAS
-from db_connect import fetch_dataframe, fetchall_dict, execute_many
-from utils import native
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from config import (
+    RANGO_FECHAS, PERFIL_TASA_MUESTREO, PERFIL_DIR, SUPRIMIR_DUPLICADOS,
+    LOTE_MAX_FILAS, LOTE_MAX_TICKERS, LOTE_PERIODO_DIAS, CACHE_CRITERIOS_ACTIVO,
+    CACHE_INDICADORES_DIR, CACHE_INDICADORES_TTL_HORAS, ESCRITOR_FLUSH_ALERTAS, ESCRITOR_FLUSH_SEGUNDOS, ESCRITOR_COMMIT_ASINCRONO,
+    POOL_METODO_INICIO,
+)
+from db_connect import fetch_dataframe, fetchall_dict
+from utils import native, resolver_operador, contar_pares_ordenados, mascara_operador_orden
+from perfilado import debe_perfilar, perfilar, generar_reporte
+from cache_criterios import EstadisticasReuso, campos_entrada_criterio, combinar_estadisticas, filas_con_cambio, origen_por_fila
+from escritor_alertas import EscritorAlertas, resumir_latencias
+from arranque_workers import (
+    publicar_catalogo, obtener_catalogo, marcar_primera_fila, tomar_arranque, crear_pool, resumir_arranques,
+)
+from simulacion import (
+    cargar_candidatos_archivo, cargar_candidatos_staging, cargar_alertas_almacenadas, acumular_alerta,
+    comparar_alertas, reportar_diff,
+)
+from concurrent.futures import as_completed
 
 # ==== CONFIGURACIÓN DE LOGGING ====
 logging.basicConfig(level=logging.INFO)
@@ -41,6 +62,21 @@ def cargar_rangos_por_criterio(criterio_id):
     )
     return rangos
 
+def cargar_rangos_criterios(criterios):
+    """Carga una sola vez los rangos de todos los criterios: {id_criterio: [rangos]}."""
+    return {criterio["id_criterio"]: cargar_rangos_por_criterio(criterio["id_criterio"]) for criterio in criterios}
+
+def resolver_catalogo(criterios_simples):
+    """
+    Devuelve (criterios, rangos_por_criterio) para un shard.
+    Con criterios_simples=None se usa el catálogo cargado por el worker al iniciar;
+    en otro caso los rangos se cargan desde la BD.
+    """
+    catalogo = obtener_catalogo()
+    if criterios_simples is None and catalogo is not None:
+        return catalogo["criterios"], catalogo["rangos"]
+    return criterios_simples, cargar_rangos_criterios(criterios_simples)
+
 def cargar_indicadores(ticker, fecha_ini, fecha_fin):
     """
     Carga todos los snapshots de indicadores para un ticker y rango de fechas.
@@ -54,6 +90,67 @@ def cargar_indicadores(ticker, fecha_ini, fecha_fin):
     """
     return fetch_dataframe(query, params=(ticker, fecha_ini, fecha_fin))
 
+def cargar_indicadores_cacheado(ticker, fecha_ini, fecha_fin, refrescar=False):
+    """
+    Igual que cargar_indicadores, pero reutiliza una copia local (pickle) en CACHE_INDICADORES_DIR
+    para el mismo ticker y rango. Usado por el modo what-if para iterar rápido sobre una regla.
+    La copia se vuelve a consultar si tiene más de CACHE_INDICADORES_TTL_HORAS o si refrescar=True.
+    """
+    nombre = re.sub(r"[^0-9A-Za-z_-]", "_", f"{ticker}_{fecha_ini}_{fecha_fin}")
+    ruta = os.path.join(CACHE_INDICADORES_DIR, f"{nombre}.pkl")
+    if not refrescar and os.path.exists(ruta):
+        antiguedad_h = (time.time() - os.path.getmtime(ruta)) / 3600
+        if antiguedad_h < CACHE_INDICADORES_TTL_HORAS:
+            logging.info(f"[{ticker}] Indicadores desde copia local {ruta} (antigüedad {antiguedad_h:.1f} h)")
+            return pd.read_pickle(ruta)
+    df = cargar_indicadores(ticker, fecha_ini, fecha_fin)
+    os.makedirs(CACHE_INDICADORES_DIR, exist_ok=True)
+    df.to_pickle(ruta)
+    return df
+
+def cargar_indicadores_lote(tickers, fecha_ini, fecha_fin):
+    """
+    Carga en una sola consulta los snapshots de indicadores de varios tickers para un periodo corto.
+    Usado por el modo por lotes para amortizar el costo fijo de consulta de los tickers pequeños.
+    """
+    query = """
+        SELECT *
+        FROM indicadores
+        WHERE ticker = ANY(%s) AND "timestamp" BETWEEN %s AND %s
+        ORDER BY ticker, "timestamp"
+    """
+    return fetch_dataframe(query, params=(list(tickers), fecha_ini, fecha_fin))
+
+def contar_filas_por_ticker(tickers, fecha_ini, fecha_fin):
+    """Cuenta los snapshots de indicadores de cada ticker en el rango: {ticker: filas}."""
+    rows = fetchall_dict("""
+        SELECT ticker, COUNT(*) AS filas
+        FROM indicadores
+        WHERE ticker = ANY(%s) AND "timestamp" BETWEEN %s AND %s
+        GROUP BY ticker
+    """, (list(tickers), fecha_ini, fecha_fin))
+    conteos = {ticker: 0 for ticker in tickers}
+    conteos.update({row["ticker"]: int(row["filas"]) for row in rows})
+    return conteos
+
+def cargar_claves_existentes(tickers, fecha):
+    """
+    Carga las claves de las alertas ya almacenadas para uno o varios tickers y un día calendario (paquete diario).
+    Se usa para descartar duplicados antes del INSERT y evitar la sonda al índice único por cada alerta.
+    Filtra por ticker y un rango semiabierto de timestamp_alerta para el día; supone un índice que cubra
+    (ticker, timestamp_alerta), p.ej. el índice único de alertas_generadas si empieza por esas columnas.
+    """
+    inicio_dia = datetime.combine(fecha, datetime.min.time())
+    rows = fetchall_dict("""
+        SELECT id_criterio_fk, ticker, timeframe, timestamp_alerta, id_rango_fk
+        FROM alertas_generadas
+        WHERE ticker = ANY(%s) AND timestamp_alerta >= %s AND timestamp_alerta < %s
+    """, (list(tickers), inicio_dia, inicio_dia + timedelta(days=1)))
+    return {
+        clave_alerta(row["id_criterio_fk"], row["ticker"], row["timeframe"], row["timestamp_alerta"], row["id_rango_fk"])
+        for row in rows
+    }
+
 # ==== FUNCIONES AUXILIARES ====
 def extraer_ymd(timestamp):
     """Extrae año, mes y día de un timestamp."""
@@ -63,6 +160,63 @@ def extraer_ymd(timestamp):
         ts = pd.to_datetime(timestamp)
     return ts.year, ts.month, ts.day
 
+def clave_alerta(id_criterio, ticker, timeframe, timestamp, id_rango):
+    """
+    Normaliza la clave única de una alerta (id_criterio_fk, ticker, timeframe, timestamp_alerta, id_rango_fk)
+    para que coincidan las tuplas generadas y las filas leídas de alertas_generadas.
+    """
+    ts = pd.Timestamp(timestamp)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return (str(id_criterio), str(ticker), str(timeframe), ts, str(id_rango))
+
+def suprimir_duplicados(alertas, claves_existentes):
+    """
+    Descarta las alertas cuya clave ya existe en BD o ya apareció en el mismo paquete.
+    Devuelve la lista filtrada y el número de alertas suprimidas.
+    """
+    nuevas = []
+    vistas = set(claves_existentes)
+    for alerta in alertas:
+        clave = clave_alerta(alerta[0], alerta[1], alerta[2], alerta[3], alerta[8])
+        if clave in vistas:
+            continue
+        vistas.add(clave)
+        nuevas.append(alerta)
+    return nuevas, len(alertas) - len(nuevas)
+
+def filas_por_periodo(conteos, fecha_ini, fecha_fin, periodo_dias=LOTE_PERIODO_DIAS):
+    """
+    Normaliza los conteos del rango completo a filas promedio por periodo de LOTE_PERIODO_DIAS días,
+    que es lo que carga cada consulta del modo por lotes. Así la agrupación no depende del largo del rango.
+    """
+    dias = max((pd.Timestamp(fecha_fin) - pd.Timestamp(fecha_ini)).total_seconds() / 86400, periodo_dias)
+    return {ticker: math.ceil(filas * periodo_dias / dias) for ticker, filas in conteos.items()}
+
+def agrupar_tickers_en_lotes(conteos, max_filas=LOTE_MAX_FILAS, max_tickers=LOTE_MAX_TICKERS):
+    """
+    Agrupa los tickers según su número de filas por periodo (first-fit decreciente).
+    Los tickers con max_filas o más filas quedan solos en su propio shard; el resto se empaqueta
+    en lotes de como máximo max_filas filas y max_tickers tickers.
+    Devuelve (tickers_grandes, lotes).
+    """
+    grandes = []
+    lotes = []  # [[filas_acumuladas, [tickers]]]
+    for ticker, filas in sorted(conteos.items(), key=lambda x: x[1], reverse=True):
+        if filas == 0:
+            continue
+        if filas >= max_filas:
+            grandes.append(ticker)
+            continue
+        for lote in lotes:
+            if lote[0] + filas <= max_filas and len(lote[1]) < max_tickers:
+                lote[0] += filas
+                lote[1].append(ticker)
+                break
+        else:
+            lotes.append([filas, [ticker]])
+    return grandes, [lote[1] for lote in lotes]
+
 def formatear_resultado_criterio(nombre_rango, tipo_impacto, puntaje):
     """Devuelve cadena legible resumen del resultado del criterio."""
     return f"{nombre_rango} | {tipo_impacto} | puntos={puntaje:.2f}"
@@ -261,6 +415,87 @@ def evaluar_orden_indicadores(fila, criterio, rangos):
     )
     return alerta
 
+def evaluar_orden_indicadores_vectorizado(df_paquete, criterio, rangos):
+    """
+    Kernel vectorizado de evaluar_orden_indicadores para un paquete completo:
+    apila las columnas del criterio en una matriz (filas, campos), cuenta los pares adyacentes
+    ordenados con un solo np.diff y asigna a cada fila el primer rango que cumple.
+    Soporta BETWEEN/NOT BETWEEN y comparaciones sobre el conteo, y ORDER / ORDER_MOST / ORDER_LESS.
+    Las filas con algún indicador NULL quedan enmascaradas (sin alerta).
+    Devuelve la lista de alertas (tuplas listas para el INSERT).
+    """
+    campos = [x.strip() for x in criterio["parametros_relevantes"].split(";")]
+    if df_paquete.empty or any(campo not in df_paquete.columns for campo in campos):
+        return []
+    direccion = (criterio.get("direccion") or "desc").lower()
+    matriz = df_paquete[campos].to_numpy(dtype=float)
+    n_pares = len(campos) - 1
+    pares_desc, pares_asc, validos = contar_pares_ordenados(matriz)
+    conteo = pares_desc if direccion == "desc" else pares_asc
+
+    # Primer rango que cumple por fila (-1 = ninguno), en el mismo orden que la versión por fila
+    asignado = np.full(len(matriz), -1)
+    for i, rango in enumerate(rangos):
+        op_python = resolver_operador(rango["operador"])
+        lim_inf = rango.get("limite_inferior")
+        lim_sup = rango.get("limite_superior")
+        mascara = mascara_operador_orden(
+            op_python, conteo, pares_desc, pares_asc, n_pares,
+            int(lim_inf) if lim_inf is not None else None,
+            int(lim_sup) if lim_sup is not None else None,
+            rango.get("incluye_limite_inferior", True),
+            rango.get("incluye_limite_superior", True),
+        )
+        asignado[mascara & validos & (asignado == -1)] = i
+    posiciones = np.nonzero(asignado >= 0)[0]
+    if len(posiciones) == 0:
+        return []
+
+    # Puntos por rango asignado (solo los rangos que cumplen en alguna fila, como en la versión por fila)
+    puntos_maximos = float(criterio["puntos_maximos_base"]) if criterio.get("puntos_maximos_base") else 10.0
+    puntos_por_rango = {}
+    for i in np.unique(asignado[posiciones]):
+        rango = rangos[i]
+        porcentaje = float(rango["porcentaje_puntos_base"])
+        tipo_impacto = (rango.get("tipo_impacto") or "").upper()
+        puntos_long = puntos_short = puntos_neutral = 0.0
+        puntaje = puntos_maximos * porcentaje / 100
+        if tipo_impacto == "LONG":
+            puntos_long = puntaje
+        elif tipo_impacto == "SHORT":
+            puntos_short = puntaje
+        elif tipo_impacto == "NEUTRAL":
+            puntos_neutral = 0.0
+            puntaje = 0.0
+        resultado = formatear_resultado_criterio(rango["nombre_rango"], tipo_impacto, puntaje)
+        puntos_por_rango[i] = (resultado, float(puntos_long), float(puntos_short), float(puntos_neutral))
+
+    timestamps = df_paquete["timestamp"].tolist()
+    fechas = pd.to_datetime(df_paquete["timestamp"])
+    anios, meses, dias = fechas.dt.year.to_numpy(), fechas.dt.month.to_numpy(), fechas.dt.day.to_numpy()
+    tickers = df_paquete["ticker"].tolist()
+    timeframes = df_paquete["timeframe"].tolist()
+    cerrados = df_paquete["is_closed"].tolist() if "is_closed" in df_paquete.columns else [None] * len(df_paquete)
+    alertas = []
+    for pos in posiciones:
+        rango = rangos[asignado[pos]]
+        resultado, puntos_long, puntos_short, puntos_neutral = puntos_por_rango[asignado[pos]]
+        valor_detalle_1 = ";".join(f"{campo}:{valor:.4f}" for campo, valor in zip(campos, matriz[pos]))
+        alertas.append((
+            str(criterio["id_criterio"]),
+            str(tickers[pos]),
+            native(timeframes[pos]),
+            str(timestamps[pos]),
+            valor_detalle_1,
+            '', '',
+            resultado,
+            rango["id_rango"],
+            puntos_long, puntos_short, puntos_neutral,
+            int(anios[pos]), int(meses[pos]), int(dias[pos]),
+            cerrados[pos]
+        ))
+    return alertas
+
 def evaluar_umbral_dinamico(fila, criterio, rangos):
     """
     Evalúa umbrales calculados dinámicamente (por fórmula) y los compara,
@@ -329,19 +564,118 @@ def evaluar_umbral_dinamico(fila, criterio, rangos):
             return alerta
     return None
 
+# ==== EVALUACIÓN DE UN PAQUETE DE SNAPSHOTS ====
+SQL_INSERT_ALERTAS_VALUES = """
+    INSERT INTO alertas_generadas
+    (id_criterio_fk, ticker, timeframe, timestamp_alerta, valor_detalle_1, valor_detalle_2, valor_detalle_3, resultado_criterio, id_rango_fk, puntos_long, puntos_short, puntos_neutral, yyyy, mm, dd, is_closed)
+    VALUES %s
+    ON CONFLICT DO NOTHING
+"""
+
+EVALUADORES = {
+    "indicador_vs_constante": evaluar_indicador_vs_constante,
+    "indicador_vs_indicador": evaluar_indicador_vs_indicador,
+    "orden_indicadores": evaluar_orden_indicadores,
+    "umbral_dinamico": evaluar_umbral_dinamico,
+}
+
+# Tipos de criterio evaluados por paquete completo con un kernel vectorizado (sin ciclo por fila)
+EVALUADORES_VECTORIZADOS = {
+    "orden_indicadores": evaluar_orden_indicadores_vectorizado,
+}
+
+def nuevo_cache_criterios():
+    """Crea el contador de reutilización de resultados del shard, o None si la reutilización está desactivada."""
+    return EstadisticasReuso() if CACHE_CRITERIOS_ACTIVO else None
+
+def evaluar_con_reuso(df_paquete, criterio, rangos, evaluador, campos, cache):
+    """
+    Evalúa un criterio solo en los snapshots cuyos valores de entrada cambian respecto al snapshot anterior
+    del mismo ticker/timeframe (ver cache_criterios.filas_con_cambio) y arrastra la decisión a las filas
+    sin cambio: conserva criterio, rango, detalle y puntos, y toma timestamp, yyyy/mm/dd e is_closed de cada fila.
+    Devuelve la lista de alertas en el orden de las filas del paquete.
+    """
+    cambio = filas_con_cambio(df_paquete, campos)
+    origen = origen_por_fila(df_paquete, cambio, pd.Series(np.arange(len(df_paquete)), index=df_paquete.index))
+    evaluadas = {}
+    for pos, (idx, fila) in zip(np.flatnonzero(cambio), df_paquete[cambio].iterrows()):
+        evaluadas[pos] = evaluador(fila, criterio, rangos)
+
+    timestamps = df_paquete["timestamp"].tolist()
+    fechas = pd.to_datetime(df_paquete["timestamp"])
+    anios, meses, dias = fechas.dt.year.to_numpy(), fechas.dt.month.to_numpy(), fechas.dt.day.to_numpy()
+    cerrados = df_paquete["is_closed"].tolist() if "is_closed" in df_paquete.columns else [None] * len(df_paquete)
+    alertas = []
+    for pos, pos_origen in enumerate(origen):
+        alerta = evaluadas[pos_origen]
+        if not alerta:
+            continue
+        if pos != pos_origen:
+            alerta = alerta[:3] + (str(timestamps[pos]),) + alerta[4:12] + (
+                int(anios[pos]), int(meses[pos]), int(dias[pos]), cerrados[pos]
+            )
+        alertas.append(alerta)
+
+    for timeframe, evaluadas_tf in pd.Series(cambio).groupby(df_paquete["timeframe"].to_numpy()):
+        cache.registrar(native(timeframe), len(evaluadas_tf) - evaluadas_tf.sum(), evaluadas_tf.sum())
+    return alertas
+
+def evaluar_paquete(df_paquete, criterios_simples, rangos_por_criterio, tiempos_criterio=None, cache=None):
+    """
+    Evalúa todos los criterios sobre un paquete de snapshots (uno o varios tickers).
+    Si se entrega tiempos_criterio (dict), acumula en él los segundos consumidos por cada id_criterio.
+    Si se entrega cache (EstadisticasReuso), los snapshots cuyos valores de entrada del criterio no cambian
+    respecto al snapshot anterior del mismo ticker/timeframe reutilizan el resultado (ver evaluar_con_reuso).
+    Devuelve la lista de alertas (tuplas listas para el INSERT).
+    """
+    alertas = []
+    if not df_paquete.empty:
+        marcar_primera_fila()
+    # CICLO por criterio
+    for criterio in criterios_simples:
+        evaluador = EVALUADORES.get(criterio.get("tipo_criterio"))
+        rangos = rangos_por_criterio.get(criterio["id_criterio"])
+        if evaluador is None or not rangos:
+            continue
+        t_criterio = time.perf_counter() if tiempos_criterio is not None else None
+        kernel = EVALUADORES_VECTORIZADOS.get(criterio.get("tipo_criterio"))
+        campos = campos_entrada_criterio(criterio) if cache is not None else None
+        if kernel is not None:
+            alertas.extend(kernel(df_paquete, criterio, rangos))
+        elif campos is not None and not df_paquete.empty:
+            alertas.extend(evaluar_con_reuso(df_paquete, criterio, rangos, evaluador, campos, cache))
+        else:
+            # CICLO por snapshot (registro de indicadores)
+            for idx, fila in df_paquete.iterrows():
+                alerta = evaluador(fila, criterio, rangos)
+                if alerta:
+                    alertas.append(alerta)
+        if t_criterio is not None:
+            tiempos_criterio[criterio["id_criterio"]] += time.perf_counter() - t_criterio
+    return alertas
+
 # ==== FUNCIÓN PRINCIPAL DE PROCESAMIENTO POR TICKER ====
-def procesar_ticker(ticker, criterios_simples, fecha_inicio, fecha_fin):
+def nuevo_escritor(etiqueta, commit_asincrono):
+    """Crea el escritor de alertas del shard con los umbrales de commit configurados."""
+    return EscritorAlertas(
+        SQL_INSERT_ALERTAS_VALUES, ESCRITOR_FLUSH_ALERTAS, ESCRITOR_FLUSH_SEGUNDOS,
+        commit_asincrono=commit_asincrono, etiqueta=etiqueta,
+    )
+
+def procesar_ticker(ticker, criterios_simples, fecha_inicio, fecha_fin, tiempos_criterio=None, commit_asincrono=ESCRITOR_COMMIT_ASINCRONO):
     """
     Procesa todos los snapshots de un ticker en el rango dado.
-    Divide en paquetes por día (para bajo uso de memoria y commits frecuentes).
-    Devuelve ticker y total de alertas generadas.
+    Divide en paquetes por día (para bajo uso de memoria); el escritor hace commit cada
+    ESCRITOR_FLUSH_ALERTAS alertas o ESCRITOR_FLUSH_SEGUNDOS segundos, siempre al cierre de un paquete.
+    Con criterios_simples=None usa el catálogo cargado por el worker al iniciar (ver arranque_workers).
+    Si se entrega tiempos_criterio (dict), acumula en él los segundos consumidos por cada id_criterio.
+    Devuelve ticker, total de alertas generadas y dict de contadores (suprimidas, cache, latencias de commit, arranque).
     """
-    from db_connect import fetch_dataframe, fetchall_dict, execute_many  # Import dentro del proceso
     logging.info(f">>> INICIO procesamiento ticker: {ticker} <<<")
     df = cargar_indicadores(ticker, fecha_inicio, fecha_fin)
     if df.empty:
         logging.warning(f"No hay datos para {ticker}")
-        return ticker, 0
+        return ticker, 0, {"suprimidas": 0, "cache": {}, "latencias_commit": [], "arranque_s": None}
     df["ticker"] = ticker
 
     # Agrupa el DataFrame por día calendario
@@ -349,78 +683,255 @@ def procesar_ticker(ticker, criterios_simples, fecha_inicio, fecha_fin):
     fechas = df['fecha'].unique()
     fechas = sorted(fechas)
     total_alertas = 0
+    total_suprimidas = 0
+    criterios_simples, rangos_por_criterio = resolver_catalogo(criterios_simples)
+    cache = nuevo_cache_criterios()
 
     # CICLO PRINCIPAL: por día
-    for fecha in fechas:
-        df_dia = df[df['fecha'] == fecha]
-        if df_dia.empty:
-            continue
-        alertas = []
-        logging.info(f"--- INICIO paquete: ticker={ticker}, fecha={fecha}, registros={len(df_dia)} ---")
-        # CICLO por criterio
-        for criterio in criterios_simples:
-            tipo = criterio.get("tipo_criterio")
-            rangos = cargar_rangos_por_criterio(criterio["id_criterio"])
-            if not rangos:
+    with nuevo_escritor(ticker, commit_asincrono) as escritor:
+        for fecha in fechas:
+            df_dia = df[df['fecha'] == fecha]
+            if df_dia.empty:
                 continue
-            # CICLO por snapshot (registro de indicadores)
-            for idx, fila in df_dia.iterrows():
-                if tipo == "indicador_vs_constante":
-                    alerta = evaluar_indicador_vs_constante(fila, criterio, rangos)
-                elif tipo == "indicador_vs_indicador":
-                    alerta = evaluar_indicador_vs_indicador(fila, criterio, rangos)
-                elif tipo == "orden_indicadores":
-                    alerta = evaluar_orden_indicadores(fila, criterio, rangos)
-                elif tipo == "umbral_dinamico":
-                    alerta = evaluar_umbral_dinamico(fila, criterio, rangos)
-                else:
-                    alerta = None
-                if alerta:
-                    alertas.append(alerta)
-        # Commit de alertas del paquete diario
-        if alertas:
-            execute_many("""
-                INSERT INTO alertas_generadas
-                (id_criterio_fk, ticker, timeframe, timestamp_alerta, valor_detalle_1, valor_detalle_2, valor_detalle_3, resultado_criterio, id_rango_fk, puntos_long, puntos_short, puntos_neutral, yyyy, mm, dd, is_closed)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT DO NOTHING
-            """, alertas)
-        logging.info(f"--- FIN paquete: ticker={ticker}, fecha={fecha}, alertas generadas={len(alertas)} ---")
-        total_alertas += len(alertas)
-    logging.info(f">>> FIN procesamiento ticker: {ticker} | Total alertas generadas: {total_alertas} <<<")
-    return ticker, total_alertas
+            logging.info(f"--- INICIO paquete: ticker={ticker}, fecha={fecha}, registros={len(df_dia)} ---")
+            alertas = evaluar_paquete(df_dia, criterios_simples, rangos_por_criterio, tiempos_criterio, cache)
+            # Supresión de duplicados contra las alertas ya almacenadas del paquete
+            suprimidas = 0
+            if alertas and SUPRIMIR_DUPLICADOS:
+                alertas, suprimidas = suprimir_duplicados(alertas, cargar_claves_existentes([ticker], fecha))
+                total_suprimidas += suprimidas
+            # Alertas del paquete diario al escritor (commit por tamaño o tiempo)
+            escritor.agregar(alertas, fecha)
+            logging.info(f"--- FIN paquete: ticker={ticker}, fecha={fecha}, alertas generadas={len(alertas)}, suprimidas={suprimidas} ---")
+            total_alertas += len(alertas)
+    logging.info(f">>> FIN procesamiento ticker: {ticker} | Total alertas generadas: {total_alertas} | Suprimidas: {total_suprimidas} | {resumir_latencias(escritor.latencias_commit)} <<<")
+    return ticker, total_alertas, {
+        "suprimidas": total_suprimidas,
+        "cache": cache.estadisticas() if cache else {},
+        "latencias_commit": escritor.latencias_commit,
+        "arranque_s": tomar_arranque(),
+    }
+
+# ==== PROCESAMIENTO POR LOTES DE TICKERS PEQUEÑOS ====
+def procesar_lote(tickers, criterios_simples, fecha_inicio, fecha_fin, tiempos_criterio=None, commit_asincrono=ESCRITOR_COMMIT_ASINCRONO):
+    """
+    Procesa varios tickers pequeños juntos (modo --batch).
+    Por cada periodo de LOTE_PERIODO_DIAS días carga los indicadores de todos los tickers en una
+    sola consulta, evalúa los criterios sobre el frame combinado y entrega las alertas al escritor,
+    que las inserta en bloque (execute_values) y hace commit por tamaño o tiempo.
+    Devuelve etiqueta del lote, total de alertas generadas y dict de contadores (igual que procesar_ticker).
+    """
+    etiqueta = f"LOTE[{tickers[0]}..+{len(tickers) - 1}]"
+    logging.info(f">>> INICIO procesamiento lote: {etiqueta} tickers={tickers} <<<")
+    criterios_simples, rangos_por_criterio = resolver_catalogo(criterios_simples)
+    cache = nuevo_cache_criterios()
+    inicio = pd.Timestamp(fecha_inicio)
+    fin = pd.Timestamp(fecha_fin)
+    periodo = timedelta(days=LOTE_PERIODO_DIAS)
+    total_alertas = 0
+    total_suprimidas = 0
+
+    # CICLO PRINCIPAL: por periodo
+    with nuevo_escritor(etiqueta, commit_asincrono) as escritor:
+        while inicio <= fin:
+            fin_periodo = min(inicio + periodo - timedelta(microseconds=1), fin)
+            df = cargar_indicadores_lote(tickers, inicio.to_pydatetime(), fin_periodo.to_pydatetime())
+            inicio = inicio + periodo
+            if df.empty:
+                continue
+            logging.info(f"--- INICIO paquete: lote={etiqueta}, desde={df['timestamp'].min()}, registros={len(df)} ---")
+            alertas = evaluar_paquete(df, criterios_simples, rangos_por_criterio, tiempos_criterio, cache)
+            # Supresión de duplicados por día del periodo
+            suprimidas = 0
+            if alertas and SUPRIMIR_DUPLICADOS:
+                claves = set()
+                for fecha in sorted(pd.to_datetime(df['timestamp']).dt.date.unique()):
+                    claves |= cargar_claves_existentes(tickers, fecha)
+                alertas, suprimidas = suprimir_duplicados(alertas, claves)
+                total_suprimidas += suprimidas
+            # Alertas del periodo al escritor (inserción en bloque, commit por tamaño o tiempo)
+            escritor.agregar(alertas, fin_periodo.date())
+            logging.info(f"--- FIN paquete: lote={etiqueta}, alertas generadas={len(alertas)}, suprimidas={suprimidas} ---")
+            total_alertas += len(alertas)
+    logging.info(f">>> FIN procesamiento lote: {etiqueta} | Total alertas generadas: {total_alertas} | Suprimidas: {total_suprimidas} | {resumir_latencias(escritor.latencias_commit)} <<<")
+    return etiqueta, total_alertas, {
+        "suprimidas": total_suprimidas,
+        "cache": cache.estadisticas() if cache else {},
+        "latencias_commit": escritor.latencias_commit,
+        "arranque_s": tomar_arranque(),
+    }
+
+# ==== MODO WHAT-IF (SIN ESCRITURA) ====
+def simular_ticker(ticker, criterios, rangos_por_criterio, fecha_inicio, fecha_fin, refrescar=False):
+    """
+    Evalúa los criterios candidatos sobre un ticker sin escribir en BD y los compara
+    contra las alertas almacenadas de los mismos criterios.
+    Con refrescar=True ignora la copia local de indicadores y vuelve a consultarlos.
+    Devuelve ticker y el resumen del diff {(id_criterio, ticker): contadores}.
+    """
+    df = cargar_indicadores_cacheado(ticker, fecha_inicio, fecha_fin, refrescar)
+    if df.empty:
+        return ticker, {}
+    df["ticker"] = ticker
+    alertas = evaluar_paquete(df, criterios, rangos_por_criterio, cache=nuevo_cache_criterios())
+    candidatas = {}
+    for a in alertas:
+        acumular_alerta(candidatas, clave_alerta(a[0], a[1], a[2], a[3], a[8])[:4], a[8], a[9], a[10])
+    almacenadas = {}
+    for row in cargar_alertas_almacenadas(ticker, list(rangos_por_criterio), fecha_inicio, fecha_fin):
+        clave = clave_alerta(row["id_criterio_fk"], row["ticker"], row["timeframe"], row["timestamp_alerta"], row["id_rango_fk"])[:4]
+        acumular_alerta(almacenadas, clave, row["id_rango_fk"], row["puntos_long"], row["puntos_short"])
+    return ticker, comparar_alertas(candidatas, almacenadas)
+
+def ejecutar_what_if(origen, tickers, fecha_inicio, fecha_fin, max_procesos, refrescar=False):
+    """
+    Carga el conjunto candidato (archivo JSON o esquema de staging), lo evalúa en paralelo
+    por ticker y reporta el diff contra alertas_generadas. No escribe en la base de datos.
+    Con refrescar=True vuelve a consultar los indicadores en lugar de usar la copia local.
+    """
+    if os.path.isfile(origen):
+        criterios, rangos_por_criterio = cargar_candidatos_archivo(origen)
+    else:
+        criterios, rangos_por_criterio = cargar_candidatos_staging(origen)
+    criterios = [c for c in criterios if c.get("tipo_criterio") != "multi_timeframe"]
+    rangos_por_criterio = {c["id_criterio"]: rangos_por_criterio.get(c["id_criterio"], []) for c in criterios}
+    logging.info(f"What-if: {len(criterios)} criterios candidatos desde {origen}, {len(tickers)} tickers, {fecha_inicio} -> {fecha_fin}")
+    resumen = {}
+    with crear_pool(max_procesos, POOL_METODO_INICIO) as executor:
+        futures = [
+            executor.submit(simular_ticker, ticker, criterios, rangos_por_criterio, fecha_inicio, fecha_fin, refrescar)
+            for ticker in tickers
+        ]
+        for future in as_completed(futures):
+            ticker, resumen_ticker = future.result()
+            resumen.update(resumen_ticker)
+    reportar_diff(resumen)
+    return resumen
+
+def procesar_perfilado(funcion, objetivo, criterios_simples, fecha_inicio, fecha_fin, tasa_muestreo, dir_perfiles, **opciones):
+    """
+    Variante de procesar_ticker / procesar_lote para el modo --profile.
+    Según la tasa de muestreo ejecuta el shard (ticker o lote de tickers) bajo cProfile dentro del worker.
+    Devuelve lo mismo que la función procesada más la info de perfilado (None si el shard no fue muestreado).
+    """
+    if not debe_perfilar(tasa_muestreo):
+        return funcion(objetivo, criterios_simples, fecha_inicio, fecha_fin, **opciones) + (None,)
+    etiqueta = objetivo if isinstance(objetivo, str) else f"lote_{objetivo[0]}"
+    resultado, info = perfilar(
+        funcion, etiqueta, dir_perfiles, objetivo, criterios_simples, fecha_inicio, fecha_fin, **opciones
+    )
+    return resultado + (info,)
 
 # ==== FUNCIÓN PRINCIPAL (MULTIPROCESO) ====
-def main():
+def main(perfilar_workers=False, tasa_muestreo=PERFIL_TASA_MUESTREO, dir_perfiles=PERFIL_DIR, por_lotes=False,
+         what_if=None, fecha_inicio=None, fecha_fin=None, tickers=None, commit_asincrono=ESCRITOR_COMMIT_ASINCRONO,
+         refrescar_cache=False):
     """
     Orquesta la ejecución paralela por tickers usando ProcessPoolExecutor.
+    Con perfilar_workers=True cada worker perfila (por muestreo) sus tickers y al final
+    se genera un reporte de puntos calientes por función evaluar_*, id_criterio y ticker.
+    Con por_lotes=True los tickers pequeños se agrupan según su número de filas y se procesan
+    juntos (procesar_lote); los tickers grandes conservan su propio shard.
+    Con what_if (archivo JSON o esquema de staging) solo se evalúa el conjunto candidato y se
+    reporta el diff contra las alertas almacenadas, sin escribir; refrescar_cache=True ignora la copia
+    local de indicadores (CACHE_INDICADORES_DIR).
+    fecha_inicio, fecha_fin y tickers sobrescriben RANGO_FECHAS y los tickers activos.
+    commit_asincrono=True desactiva synchronous_commit en las sesiones de escritura (cargas históricas).
     """
     logging.info(f"==== INICIO SCRIPT ALERTAS INDICADORES (Multiprocessing) ====")
+    tickers = tickers or obtener_tickers_activos()
+    logging.info(f"Tickers activos: {tickers}")
+
+    fecha_inicio = fecha_inicio or RANGO_FECHAS["inicio"]
+    fecha_fin = fecha_fin or RANGO_FECHAS["fin"]
+
+    max_procesos = 3  # Ajusta según la capacidad de tu máquina
+
+    if what_if:
+        ejecutar_what_if(what_if, tickers, fecha_inicio, fecha_fin, max_procesos, refrescar_cache)
+        logging.info(f"==== FIN SCRIPT ALERTAS INDICADORES (what-if, sin escritura) ====")
+        return
+
     criterios = cargar_criterios()
     criterios_simples = [c for c in criterios if c.get("tipo_criterio") != "multi_timeframe"]
     logging.info(f"Criterios simples encontrados: {len(criterios_simples)}")
-    tickers = obtener_tickers_activos()
-    logging.info(f"Tickers activos: {tickers}")
 
-    fecha_inicio = RANGO_FECHAS["inicio"]
-    fecha_fin = RANGO_FECHAS["fin"]
+    # Shards: un ticker por shard, o lotes de tickers pequeños en modo por lotes
+    if por_lotes:
+        conteos = contar_filas_por_ticker(tickers, fecha_inicio, fecha_fin)
+        grandes, lotes = agrupar_tickers_en_lotes(filas_por_periodo(conteos, fecha_inicio, fecha_fin))
+        logging.info(f"Modo por lotes: {len(grandes)} tickers con shard propio, {len(lotes)} lotes de tickers pequeños")
+        shards = [(procesar_ticker, ticker) for ticker in grandes] + [(procesar_lote, lote) for lote in lotes]
+    else:
+        shards = [(procesar_ticker, ticker) for ticker in tickers]
 
-    max_procesos = 3  # Ajusta según la capacidad de tu máquina
+    # Catálogo compilado (criterios + rangos) publicado una vez para todos los workers
+    ruta_catalogo = publicar_catalogo({
+        "criterios": criterios_simples,
+        "rangos": cargar_rangos_criterios(criterios_simples),
+    })
 
-    # Procesamiento paralelo por tickers
-    with ProcessPoolExecutor(max_workers=max_procesos) as executor:
-        futures = []
-        for ticker in tickers:
-            futures.append(executor.submit(procesar_ticker, ticker, criterios_simples, fecha_inicio, fecha_fin))
-        for future in as_completed(futures):
-            ticker, total_alertas = future.result()
-            logging.info(f"Resumen Ticker {ticker}: alertas totales generadas = {total_alertas}")
+    # Procesamiento paralelo por shards
+    infos_perfil = []
+    total_suprimidas = 0
+    estadisticas_cache = {}
+    latencias_commit = []
+    arranques = []
+    try:
+        with crear_pool(max_procesos, POOL_METODO_INICIO, ruta_catalogo) as executor:
+            futures = []
+            for funcion, objetivo in shards:
+                if perfilar_workers:
+                    futures.append(executor.submit(procesar_perfilado, funcion, objetivo, None, fecha_inicio, fecha_fin, tasa_muestreo, dir_perfiles, commit_asincrono=commit_asincrono))
+                else:
+                    futures.append(executor.submit(funcion, objetivo, None, fecha_inicio, fecha_fin, commit_asincrono=commit_asincrono))
+            for future in as_completed(futures):
+                if perfilar_workers:
+                    ticker, total_alertas, contadores, info = future.result()
+                    infos_perfil.append(info)
+                else:
+                    ticker, total_alertas, contadores = future.result()
+                total_suprimidas += contadores["suprimidas"]
+                combinar_estadisticas(estadisticas_cache, contadores["cache"])
+                latencias_commit.extend(contadores["latencias_commit"])
+                if contadores["arranque_s"] is not None:
+                    arranques.append(contadores["arranque_s"])
+                logging.info(f"Resumen Ticker {ticker}: alertas totales generadas = {total_alertas}, suprimidas por duplicado = {contadores['suprimidas']}")
+    finally:
+        os.remove(ruta_catalogo)
+
+    if perfilar_workers:
+        generar_reporte(infos_perfil, criterios=criterios_simples, dir_perfiles=dir_perfiles)
+
+    logging.info(f"Total alertas suprimidas por duplicado: {total_suprimidas}")
+    logging.info(f"Latencia de commits: {resumir_latencias(latencias_commit)}")
+    logging.info(f"Arranque de workers (creación del pool -> primera fila evaluada): {resumir_arranques(arranques)}")
+    for timeframe, (aciertos, fallos) in sorted(estadisticas_cache.items()):
+        tasa = 100.0 * aciertos / (aciertos + fallos) if aciertos + fallos else 0.0
+        logging.info(f"Cache criterios timeframe={timeframe}: aciertos={aciertos}, fallos={fallos}, tasa={tasa:.1f}%")
 
     logging.info(f"==== FIN SCRIPT ALERTAS INDICADORES ====")
 
 # ==== EJECUCIÓN PRINCIPAL ====
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generador multiproceso de alertas de indicadores")
+    parser.add_argument("--profile", action="store_true", help="Perfila los workers con cProfile y genera reporte de puntos calientes")
+    parser.add_argument("--profile-sample", type=float, default=PERFIL_TASA_MUESTREO, help="Fracción de tickers perfilados (0-1)")
+    parser.add_argument("--profile-dir", default=PERFIL_DIR, help="Directorio donde se guardan los perfiles .prof")
+    parser.add_argument("--batch", action="store_true", help="Agrupa los tickers pequeños en lotes evaluados con una sola consulta por periodo")
+    parser.add_argument("--what-if", metavar="ARCHIVO_O_ESQUEMA", help="Evalúa criterios candidatos (JSON o esquema de staging) y reporta el diff sin escribir")
+    parser.add_argument("--refresh-cache", action="store_true", help="Con --what-if, vuelve a consultar los indicadores en lugar de usar la copia local")
+    parser.add_argument("--desde", help="Fecha inicial (sobrescribe RANGO_FECHAS['inicio'])")
+    parser.add_argument("--hasta", help="Fecha final (sobrescribe RANGO_FECHAS['fin'])")
+    parser.add_argument("--tickers", help="Lista de tickers separados por coma (por defecto, los activos)")
+    parser.add_argument("--async-commit", action="store_true", default=ESCRITOR_COMMIT_ASINCRONO, help="SET synchronous_commit = off en las sesiones de escritura (backfills)")
+    args = parser.parse_args()
+    main(
+        perfilar_workers=args.profile, tasa_muestreo=args.profile_sample, dir_perfiles=args.profile_dir, por_lotes=args.batch,
+        what_if=args.what_if, fecha_inicio=args.desde, fecha_fin=args.hasta,
+        tickers=[t.strip() for t in args.tickers.split(",")] if args.tickers else None,
+        commit_asincrono=args.async_commit, refrescar_cache=args.refresh_cache,
+    )
 
 """
 VERSIÓN: 1.3.0
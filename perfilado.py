@@ -0,0 +1,98 @@
+"""
+Perfilado de workers para el generador de alertas (modo --profile).
+    - Cada worker decide por muestreo si perfila el ticker que recibe, de modo que el modo
+      pueda dejarse activo en una fracción de las ejecuciones productivas.
+    - El perfil cProfile de cada ticker se vuelca a disco y el proceso padre fusiona todos los archivos.
+    - Además del perfil por función se acumulan tiempos por id_criterio y por ticker,
+      que cProfile no puede distinguir porque todos pasan por las mismas funciones evaluar_*.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import time
+from collections import defaultdict
+
+def debe_perfilar(tasa_muestreo):
+    """Decide por muestreo si la tarea actual se perfila."""
+    return tasa_muestreo >= 1.0 or random.random() < tasa_muestreo
+
+def perfilar(funcion, etiqueta, dir_perfiles, *args, **kwargs):
+    """
+    Ejecuta funcion(*args, **kwargs) bajo cProfile.
+    Inyecta el acumulador tiempos_criterio en kwargs y vuelca el perfil a dir_perfiles/<etiqueta>.prof.
+    Devuelve el resultado de la función y un dict con la ruta del perfil y los tiempos medidos.
+    """
+    tiempos_criterio = defaultdict(float)
+    perfilador = cProfile.Profile()
+    t0 = time.perf_counter()
+    perfilador.enable()
+    try:
+        resultado = funcion(*args, tiempos_criterio=tiempos_criterio, **kwargs)
+    finally:
+        perfilador.disable()
+    segundos = time.perf_counter() - t0
+    os.makedirs(dir_perfiles, exist_ok=True)
+    nombre = re.sub(r"[^0-9A-Za-z_-]", "_", str(etiqueta))
+    ruta = os.path.join(dir_perfiles, f"{nombre}.{os.getpid()}.prof")
+    perfilador.dump_stats(ruta)
+    info = {
+        "etiqueta": etiqueta,
+        "ruta_stats": ruta,
+        "segundos": segundos,
+        "criterios": dict(tiempos_criterio),
+    }
+    return resultado, info
+
+def generar_reporte(infos, criterios=None, dir_perfiles=None, top=25):
+    """
+    Fusiona los perfiles de los workers y registra en el log el reporte de puntos calientes:
+      - funciones evaluar_* (llamadas, tiempo propio y acumulado)
+      - tiempo por id_criterio
+      - tiempo por ticker
+      - top de funciones por tiempo acumulado
+    Si se indica dir_perfiles, guarda el perfil fusionado en perfil_total.prof.
+    Los perfiles por shard se borran una vez fusionados, para que el directorio no crezca entre ejecuciones.
+    """
+    infos = [info for info in infos if info]
+    if not infos:
+        logging.info("Perfilado: ningún ticker fue muestreado.")
+        return None
+    stats = pstats.Stats(*[info["ruta_stats"] for info in infos])
+    for info in infos:
+        os.remove(info["ruta_stats"])
+    if dir_perfiles:
+        stats.dump_stats(os.path.join(dir_perfiles, "perfil_total.prof"))
+
+    lineas = ["==== REPORTE DE PERFILADO ====", f"Tickers perfilados: {len(infos)}", "", "-- Funciones evaluar_* --"]
+    evaluadores = [
+        (nombre, cc, nc, tt, ct)
+        for (archivo, linea, nombre), (cc, nc, tt, ct, callers) in stats.stats.items()
+        if nombre.startswith("evaluar_")
+    ]
+    for nombre, cc, nc, tt, ct in sorted(evaluadores, key=lambda x: x[4], reverse=True):
+        lineas.append(f"{nombre:35} llamadas={nc:>10} propio={tt:10.3f}s acumulado={ct:10.3f}s")
+
+    nombres = {str(c["id_criterio"]): c.get("nombre_criterio", "") for c in (criterios or [])}
+    por_criterio = defaultdict(float)
+    for info in infos:
+        for id_criterio, segundos in info["criterios"].items():
+            por_criterio[str(id_criterio)] += segundos
+    lineas += ["", "-- Tiempo por id_criterio --"]
+    for id_criterio, segundos in sorted(por_criterio.items(), key=lambda x: x[1], reverse=True):
+        lineas.append(f"{id_criterio:>8} {nombres.get(id_criterio, ''):40} {segundos:10.3f}s")
+
+    lineas += ["", "-- Tiempo por ticker (en modo --batch cada lote aparece como lote_<primer ticker>, sin desglose por ticker) --"]
+    for info in sorted(infos, key=lambda x: x["segundos"], reverse=True):
+        lineas.append(f"{info['etiqueta']:20} {info['segundos']:10.3f}s")
+
+    salida = io.StringIO()
+    stats.stream = salida
+    stats.sort_stats("cumulative").print_stats(top)
+    lineas += ["", f"-- Top {top} funciones por tiempo acumulado --", salida.getvalue()]
+    logging.info("\n".join(lineas))
+    return stats
@@ -0,0 +1,121 @@
+"""
+Modo what-if (--what-if) para ajustar reglas sin escribir en alertas_generadas.
+    - Carga un conjunto candidato de criterios/rangos desde un archivo JSON o desde un esquema de staging
+      con las mismas tablas que producción (catalogo_criterios, criterio_rangos_ponderacion).
+    - Las alertas candidatas se comparan en memoria contra las almacenadas para las mismas claves
+      (id_criterio, ticker, timeframe, timestamp) y se resume el diff por criterio y ticker:
+      alertas agregadas, eliminadas, con rango o puntos cambiados y deltas de puntos long/short.
+      Las claves con varias filas almacenadas (rangos de ejecuciones anteriores) se agrupan y se cuentan aparte.
+
+Formato del archivo JSON:
+    {"criterios": [{"id_criterio": 7, "nombre_criterio": "...", "tipo_criterio": "...",
+                    "parametros_relevantes": "...", "puntos_maximos_base": 10, "direccion": "desc",
+                    "rangos": [{"id_rango": 1, "nombre_rango": "...", "operador": "BETWEEN", ...}]}]}
+"""
+
+import json
+import logging
+from collections import defaultdict
+from psycopg2 import sql
+from db_connect import fetchall_dict
+
+def cargar_candidatos_archivo(ruta):
+    """Carga criterios y rangos candidatos desde un JSON. Devuelve (criterios, {id_criterio: [rangos]})."""
+    with open(ruta, encoding="utf-8") as f:
+        datos = json.load(f)
+    criterios = []
+    rangos_por_criterio = {}
+    for criterio in datos.get("criterios", []):
+        criterio = dict(criterio)
+        rangos = criterio.pop("rangos", [])
+        if not criterio.get("activo", True):
+            continue
+        criterios.append(criterio)
+        rangos_por_criterio[criterio["id_criterio"]] = rangos
+    return criterios, rangos_por_criterio
+
+def cargar_candidatos_staging(esquema):
+    """
+    Carga criterios y rangos candidatos desde un esquema de staging con las tablas
+    catalogo_criterios y criterio_rangos_ponderacion. Devuelve (criterios, {id_criterio: [rangos]}).
+    """
+    criterios = fetchall_dict(sql.SQL(
+        "SELECT id_criterio, nombre_criterio, tipo_criterio, parametros_relevantes, puntos_maximos_base, direccion, activo, temporalidades_implicadas FROM {}.catalogo_criterios WHERE activo = TRUE"
+    ).format(sql.Identifier(esquema)))
+    rangos_por_criterio = {criterio["id_criterio"]: [] for criterio in criterios}
+    rangos = fetchall_dict(sql.SQL("SELECT * FROM {}.criterio_rangos_ponderacion").format(sql.Identifier(esquema)))
+    for rango in rangos:
+        if rango["id_criterio_fk"] in rangos_por_criterio:
+            rangos_por_criterio[rango["id_criterio_fk"]].append(rango)
+    return criterios, rangos_por_criterio
+
+def cargar_alertas_almacenadas(ticker, ids_criterio, fecha_ini, fecha_fin):
+    """Carga las alertas almacenadas de un ticker para los criterios y rango de fechas indicados."""
+    return fetchall_dict("""
+        SELECT id_criterio_fk, ticker, timeframe, timestamp_alerta, id_rango_fk, puntos_long, puntos_short
+        FROM alertas_generadas
+        WHERE ticker = %s AND id_criterio_fk = ANY(%s) AND timestamp_alerta BETWEEN %s AND %s
+    """, (ticker, list(ids_criterio), fecha_ini, fecha_fin))
+
+def acumular_alerta(alertas, clave, id_rango, puntos_long, puntos_short):
+    """
+    Agrega una alerta al dict {(id_criterio, ticker, timeframe, timestamp): [ids_rango, puntos_long, puntos_short, filas]}.
+    Varias filas con la misma clave (reejecuciones con rangos anteriores) se agrupan sumando sus puntos.
+    """
+    item = alertas.setdefault(clave, [set(), 0.0, 0.0, 0])
+    item[0].add(str(id_rango))
+    item[1] += float(puntos_long or 0.0)
+    item[2] += float(puntos_short or 0.0)
+    item[3] += 1
+
+def comparar_alertas(candidatas, almacenadas, tolerancia=1e-6):
+    """
+    Compara dos dicts construidos con acumular_alerta.
+    Devuelve el resumen {(id_criterio, ticker): contadores} con:
+      - agregadas / eliminadas: claves solo en el candidato / solo en lo almacenado
+      - cambiadas: misma clave con distinto conjunto de id_rango
+      - puntos_cambiados: mismos rangos pero distintos puntos (p.ej. cambio de porcentaje_puntos_base)
+      - multiples: claves con varias filas almacenadas (rangos de ejecuciones anteriores)
+      - delta_long / delta_short: candidato - almacenado
+    """
+    resumen = defaultdict(lambda: {
+        "agregadas": 0, "eliminadas": 0, "cambiadas": 0, "puntos_cambiados": 0, "multiples": 0,
+        "delta_long": 0.0, "delta_short": 0.0,
+    })
+    vacia = [set(), 0.0, 0.0, 0]
+    for clave in candidatas.keys() | almacenadas.keys():
+        nueva = candidatas.get(clave)
+        previa = almacenadas.get(clave)
+        item = resumen[(clave[0], clave[1])]
+        if previa is not None and previa[3] > 1:
+            item["multiples"] += 1
+        if previa is None:
+            item["agregadas"] += 1
+        elif nueva is None:
+            item["eliminadas"] += 1
+        elif nueva[0] != previa[0]:
+            item["cambiadas"] += 1
+        elif abs(nueva[1] - previa[1]) > tolerancia or abs(nueva[2] - previa[2]) > tolerancia:
+            item["puntos_cambiados"] += 1
+        nueva, previa = nueva or vacia, previa or vacia
+        item["delta_long"] += nueva[1] - previa[1]
+        item["delta_short"] += nueva[2] - previa[2]
+    return dict(resumen)
+
+def reportar_diff(resumen):
+    """Registra en el log el diff por criterio y ticker, y los totales."""
+    lineas = ["==== DIFF WHAT-IF (candidato vs almacenado) ====",
+              f"{'criterio':>8} {'ticker':15} {'agregadas':>10} {'eliminadas':>10} {'cambiadas':>10} {'puntos_camb':>11} {'multiples':>10} {'delta_long':>12} {'delta_short':>12}"]
+    totales = defaultdict(float)
+    for (id_criterio, ticker), item in sorted(resumen.items()):
+        lineas.append(
+            f"{id_criterio:>8} {ticker:15} {item['agregadas']:>10} {item['eliminadas']:>10} {item['cambiadas']:>10} "
+            f"{item['puntos_cambiados']:>11} {item['multiples']:>10} {item['delta_long']:>12.2f} {item['delta_short']:>12.2f}"
+        )
+        for campo, valor in item.items():
+            totales[campo] += valor
+    lineas.append(
+        f"{'TOTAL':>8} {'':15} {int(totales['agregadas']):>10} {int(totales['eliminadas']):>10} {int(totales['cambiadas']):>10} "
+        f"{int(totales['puntos_cambiados']):>11} {int(totales['multiples']):>10} {totales['delta_long']:>12.2f} {totales['delta_short']:>12.2f}"
+    )
+    logging.info("\n".join(lineas))
@@ -0,0 +1,18 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_connect
+
+# utils carga la tabla operadores al importarse; en las pruebas se usa una copia fija sin BD
+OPERADORES = [
+    {"operador": "BETWEEN", "operador_python": "between", "descripcion": "Entre límites"},
+    {"operador": "NOT BETWEEN", "operador_python": "not_between", "descripcion": "Fuera de límites"},
+    {"operador": ">", "operador_python": "gt", "descripcion": "Mayor que"},
+    {"operador": "ORDER", "operador_python": "order", "descripcion": "Orden descendente"},
+    {"operador": "ORDER_MOST", "operador_python": "order_most", "descripcion": "Mayoría en orden descendente"},
+    {"operador": "ORDER_LESS", "operador_python": "order_less", "descripcion": "Orden ascendente"},
+]
+
+db_connect.fetchall_dict = lambda query, params=None: OPERADORES
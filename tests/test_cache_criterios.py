@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cache_criterios import EstadisticasReuso, filas_con_cambio
+from main import evaluar_paquete
+
+def rango(id_rango, lim_inf, lim_sup, operador="BETWEEN", tipo_impacto="LONG", porcentaje=50):
+    return {
+        "id_rango": id_rango,
+        "nombre_rango": f"rango_{id_rango}",
+        "operador": operador,
+        "limite_inferior": lim_inf,
+        "limite_superior": lim_sup,
+        "incluye_limite_inferior": True,
+        "incluye_limite_superior": True,
+        "tipo_impacto": tipo_impacto,
+        "porcentaje_puntos_base": porcentaje,
+    }
+
+CRITERIOS = [
+    {"id_criterio": 1, "tipo_criterio": "indicador_vs_constante", "parametros_relevantes": "rsi", "puntos_maximos_base": 10},
+    {"id_criterio": 2, "tipo_criterio": "indicador_vs_indicador", "parametros_relevantes": "rsi;ema50", "puntos_maximos_base": 10},
+    {"id_criterio": 3, "tipo_criterio": "umbral_dinamico", "parametros_relevantes": "rsi; ema50 / 2", "puntos_maximos_base": 10},
+]
+RANGOS = {
+    1: [rango(1, 0, 45, tipo_impacto="SHORT"), rango(2, 45, 100)],
+    2: [rango(3, 0.5, 1.0)],
+    3: [rango(4, None, None, operador=">")],
+}
+
+@pytest.fixture
+def df_paquete():
+    # Snapshots de 5 minutos de dos tickers y dos timeframes intercalados; los valores se repiten
+    # mientras la vela sigue abierta, con tramos NULL y cruces de día
+    rng = np.random.default_rng(3)
+    partes = []
+    for ticker in ["BTCUSDT", "ETHUSDT"]:
+        for timeframe, repeticiones in [("1h", 12), ("4h", 48)]:
+            n = 400
+            rsi = np.repeat(np.round(rng.normal(50, 10, n // repeticiones + 1), 1), repeticiones)[:n]
+            rsi[100:130] = np.nan
+            partes.append(pd.DataFrame({
+                "ticker": ticker,
+                "timeframe": timeframe,
+                "timestamp": pd.date_range("2024-01-01 20:00", periods=n, freq="5min"),
+                "rsi": rsi,
+                "ema50": rsi + np.repeat(rng.choice([-1.0, 1.0], n // 24 + 1), 24)[:n],
+                "is_closed": [i % repeticiones == repeticiones - 1 for i in range(n)],
+            }))
+    return pd.concat(partes).sort_values(["timestamp", "ticker"], kind="stable").reset_index(drop=True)
+
+def test_reuso_igual_a_evaluacion_completa(df_paquete):
+    esperado = evaluar_paquete(df_paquete, CRITERIOS, RANGOS)
+    cache = EstadisticasReuso()
+    obtenido = evaluar_paquete(df_paquete, CRITERIOS, RANGOS, cache=cache)
+    assert esperado
+    # Tuplas completas: incluye timestamp, yyyy/mm/dd e is_closed de cada snapshot reutilizado
+    assert obtenido == esperado
+    assert len({alerta[12:15] for alerta in obtenido}) > 1
+    assert {alerta[15] for alerta in obtenido} == {True, False}
+    estadisticas = cache.estadisticas()
+    assert set(estadisticas) == {"1h", "4h"}
+    assert all(aciertos > fallos for aciertos, fallos in estadisticas.values())
+    assert sum(aciertos + fallos for aciertos, fallos in estadisticas.values()) == len(df_paquete) * len(CRITERIOS)
+
+def test_filas_con_cambio_por_ticker_y_timeframe():
+    df = pd.DataFrame({
+        "ticker": ["A", "A", "B", "A", "B", "A"],
+        "timeframe": ["1h", "1h", "1h", "4h", "1h", "1h"],
+        "rsi": [1.0, 1.0, 1.0, 1.0, np.nan, np.nan],
+    })
+    # Primera fila de cada grupo siempre cambia; NULL -> NULL no es cambio; los campos ausentes se ignoran
+    assert filas_con_cambio(df, ["rsi", "no_existe"]).tolist() == [True, False, True, True, True, True]
+    df.loc[5, "rsi"] = 1.0
+    assert filas_con_cambio(df, ["rsi"]).tolist() == [True, False, True, True, True, False]
+    assert filas_con_cambio(df, ["no_existe"]).tolist() == [True, False, True, True, False, False]
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from main import clave_alerta, suprimir_duplicados
+
+def alerta(id_criterio, timestamp, id_rango, ticker="BTCUSDT", timeframe="1h"):
+    yyyy, mm, dd = pd.Timestamp(timestamp).year, pd.Timestamp(timestamp).month, pd.Timestamp(timestamp).day
+    return (
+        str(id_criterio), ticker, timeframe, timestamp, "rsi:50.0000", '', '',
+        "rango | LONG | puntos=5.00", id_rango, 5.0, 0.0, 0.0, yyyy, mm, dd, False,
+    )
+
+def test_clave_alerta_timestamp_con_zona_vs_sin_zona():
+    almacenada = clave_alerta(7, "BTCUSDT", "1h", pd.Timestamp("2024-01-01 05:00:00+00:00").to_pydatetime(), 3)
+    generada = clave_alerta("7", "BTCUSDT", "1h", "2024-01-01 05:00:00", "3")
+    assert almacenada == generada
+
+def test_clave_alerta_convierte_zona_a_utc():
+    almacenada = clave_alerta(7, "BTCUSDT", "1h", "2024-01-01 00:00:00-05:00", 3)
+    assert almacenada == clave_alerta(7, "BTCUSDT", "1h", "2024-01-01 05:00:00", 3)
+
+def test_suprimir_duplicados_contra_bd():
+    existentes = {clave_alerta(7, "BTCUSDT", "1h", pd.Timestamp("2024-01-01 05:00:00+00:00"), 3)}
+    alertas = [alerta(7, "2024-01-01 05:00:00", 3), alerta(7, "2024-01-01 05:05:00", 3), alerta(7, "2024-01-01 05:00:00", 4)]
+    nuevas, suprimidas = suprimir_duplicados(alertas, existentes)
+    assert suprimidas == 1
+    assert nuevas == alertas[1:]
+
+def test_suprimir_duplicados_dentro_del_paquete():
+    alertas = [alerta(7, "2024-01-01 05:00:00", 3), alerta(7, "2024-01-01 05:00:00", 3), alerta(8, "2024-01-01 05:00:00", 3)]
+    nuevas, suprimidas = suprimir_duplicados(alertas, set())
+    assert suprimidas == 1
+    assert nuevas == [alertas[0], alertas[2]]
+    assert suprimir_duplicados(alertas, set())[0] == nuevas
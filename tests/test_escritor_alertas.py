@@ -0,0 +1,69 @@
+import logging
+import re
+
+import psycopg2.extras
+import pytest
+
+import escritor_alertas
+from escritor_alertas import EscritorAlertas
+
+class CursorFalso:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        pass
+
+class ConexionFalsa:
+    def __init__(self, fallar_en_commit=None):
+        self.commits = 0
+        self.fallar_en_commit = fallar_en_commit
+
+    def cursor(self):
+        return CursorFalso()
+
+    def commit(self):
+        self.commits += 1
+        if self.commits == self.fallar_en_commit:
+            raise RuntimeError("commit fallido")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def conexion(monkeypatch):
+    conexion = ConexionFalsa()
+    monkeypatch.setattr(escritor_alertas, "get_connection", lambda: conexion)
+    monkeypatch.setattr(psycopg2.extras, "execute_values", lambda cur, query, alertas, page_size=None: None)
+    return conexion
+
+def commits_registrados(caplog):
+    patron = re.compile(r"COMMIT .*: alertas=(\d+), punto de reanudación=(\S+) ---")
+    return [(int(m.group(1)), m.group(2)) for m in map(patron.search, caplog.messages) if m]
+
+def test_punto_de_reanudacion_registrado_por_commit(conexion, caplog):
+    caplog.set_level(logging.INFO)
+    with EscritorAlertas("INSERT", flush_alertas=10, flush_segundos=3600) as escritor:
+        escritor.agregar([("d1",)] * 3, "d1")
+        escritor.agregar([("d2",)] * 4, "d2")
+        assert commits_registrados(caplog) == []
+        escritor.agregar([("d3",)] * 25, "d3")
+        # El primer bloque (3 de d1 + 4 de d2 + 3 de d3) ya confirma d2; d3 solo al escribir su resto
+        assert commits_registrados(caplog) == [(10, "d2"), (10, "d2"), (10, "d2")]
+        assert escritor.punto_confirmado == "d2"
+    assert commits_registrados(caplog)[-1] == (2, "d3")
+    assert escritor.punto_confirmado == "d3"
+
+def test_commit_fallido_no_avanza_el_punto(conexion):
+    conexion.fallar_en_commit = 2
+    escritor = EscritorAlertas("INSERT", flush_alertas=10, flush_segundos=3600)
+    escritor.agregar([("d1",)] * 3, "d1")
+    with pytest.raises(RuntimeError):
+        escritor.agregar([("d2",)] * 25, "d2")
+    assert escritor.punto_confirmado == "d1"
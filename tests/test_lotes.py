@@ -0,0 +1,31 @@
+from main import agrupar_tickers_en_lotes, filas_por_periodo
+
+def test_tickers_grandes_quedan_solos():
+    grandes, lotes = agrupar_tickers_en_lotes({"A": 150, "B": 100, "C": 40, "D": 30}, max_filas=100, max_tickers=10)
+    assert grandes == ["A", "B"]
+    assert lotes == [["C", "D"]]
+
+def test_first_fit_decreciente():
+    conteos = {"A": 60, "B": 50, "C": 40, "D": 30, "E": 10}
+    grandes, lotes = agrupar_tickers_en_lotes(conteos, max_filas=100, max_tickers=10)
+    assert grandes == []
+    assert lotes == [["A", "C"], ["B", "D", "E"]]
+
+def test_limite_de_tickers_por_lote():
+    conteos = {f"T{i}": 1 for i in range(5)}
+    grandes, lotes = agrupar_tickers_en_lotes(conteos, max_filas=100, max_tickers=2)
+    assert grandes == []
+    assert [len(lote) for lote in lotes] == [2, 2, 1]
+    assert sorted(t for lote in lotes for t in lote) == sorted(conteos)
+
+def test_tickers_sin_filas_se_omiten():
+    grandes, lotes = agrupar_tickers_en_lotes({"A": 0, "B": 5}, max_filas=100, max_tickers=10)
+    assert grandes == []
+    assert lotes == [["B"]]
+
+def test_filas_por_periodo_no_depende_del_largo_del_rango():
+    # 288 snapshots diarios por timeframe, 2 timeframes
+    corto = filas_por_periodo({"A": 576 * 7}, "2024-01-01 00:00:00", "2024-01-08 00:00:00", periodo_dias=1)
+    largo = filas_por_periodo({"A": 576 * 517}, "2024-01-01 00:00:00", "2025-06-01 00:00:00", periodo_dias=1)
+    assert corto == largo == {"A": 576}
+    assert filas_por_periodo({"A": 1, "B": 0}, "2024-01-01", "2024-12-31", periodo_dias=1) == {"A": 1, "B": 0}
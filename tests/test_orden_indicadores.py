@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import contar_pares_ordenados, mascara_operador_orden
+from main import evaluar_orden_indicadores, evaluar_orden_indicadores_vectorizado
+
+CAMPOS = ["ema10", "ema20", "ema50"]
+
+def rango(id_rango, lim_inf, lim_sup, incluye_inf=True, incluye_sup=True, operador="BETWEEN", tipo_impacto="LONG", porcentaje=50):
+    return {
+        "id_rango": id_rango,
+        "nombre_rango": f"rango_{id_rango}",
+        "operador": operador,
+        "limite_inferior": lim_inf,
+        "limite_superior": lim_sup,
+        "incluye_limite_inferior": incluye_inf,
+        "incluye_limite_superior": incluye_sup,
+        "tipo_impacto": tipo_impacto,
+        "porcentaje_puntos_base": porcentaje,
+    }
+
+def criterio(direccion):
+    return {
+        "id_criterio": 7,
+        "tipo_criterio": "orden_indicadores",
+        "parametros_relevantes": "; ".join(CAMPOS),
+        "puntos_maximos_base": 10,
+        "direccion": direccion,
+    }
+
+@pytest.fixture
+def df_paquete():
+    rng = np.random.default_rng(0)
+    n = 60
+    # Valores redondeados para incluir empates (no cuentan en ninguna dirección)
+    valores = np.round(rng.normal(100, 1, size=(n, len(CAMPOS))), 0)
+    df = pd.DataFrame(valores, columns=CAMPOS)
+    df["ticker"] = "BTCUSDT"
+    df["timeframe"] = "1h"
+    df["timestamp"] = pd.date_range("2024-01-01", periods=n, freq="5min")
+    df["is_closed"] = [i % 12 == 11 for i in range(n)]
+    return df
+
+def evaluar_por_fila(df, crit, rangos):
+    alertas = [evaluar_orden_indicadores(fila, crit, rangos) for _, fila in df.iterrows()]
+    return [a for a in alertas if a]
+
+@pytest.mark.parametrize("direccion", ["desc", "asc"])
+@pytest.mark.parametrize("incluye_inf,incluye_sup", [(True, True), (True, False), (False, True), (False, False)])
+def test_paridad_con_version_por_fila(df_paquete, direccion, incluye_inf, incluye_sup):
+    rangos = [
+        rango(1, 2, 2, tipo_impacto="LONG"),
+        rango(2, 1, 2, incluye_inf, incluye_sup, tipo_impacto="SHORT"),  # Se solapa con el rango 1: gana el primero
+        rango(3, 0, 1, incluye_inf, incluye_sup, tipo_impacto="NEUTRAL"),
+    ]
+    crit = criterio(direccion)
+    esperado = evaluar_por_fila(df_paquete, crit, rangos)
+    assert esperado
+    assert evaluar_orden_indicadores_vectorizado(df_paquete, crit, rangos) == esperado
+
+def test_filas_con_null_quedan_enmascaradas(df_paquete):
+    df_paquete.loc[[0, 5], "ema20"] = np.nan
+    alertas = evaluar_orden_indicadores_vectorizado(df_paquete, criterio("desc"), [rango(1, 0, 2)])
+    timestamps = {a[3] for a in alertas}
+    assert len(alertas) == len(df_paquete) - 2
+    assert str(df_paquete["timestamp"].iloc[0]) not in timestamps
+    assert str(df_paquete["timestamp"].iloc[5]) not in timestamps
+
+def test_rango_sin_porcentaje_que_no_cumple_no_falla(df_paquete):
+    rangos = [rango(1, 0, 2), rango(2, 5, 6, porcentaje=None)]
+    alertas = evaluar_orden_indicadores_vectorizado(df_paquete, criterio("desc"), rangos)
+    assert len(alertas) == len(df_paquete)
+
+def test_contar_pares_ordenados():
+    matriz = np.array([[3.0, 2.0, 1.0], [1.0, 2.0, 3.0], [2.0, 2.0, 1.0], [1.0, np.nan, 0.0]])
+    pares_desc, pares_asc, validos = contar_pares_ordenados(matriz)
+    assert pares_desc.tolist()[:3] == [2, 0, 1]
+    assert pares_asc.tolist()[:3] == [0, 2, 0]
+    assert validos.tolist() == [True, True, True, False]
+
+def test_mascara_operadores_orden():
+    pares_desc = np.array([3, 2, 1, 0])
+    pares_asc = np.array([0, 1, 2, 3])
+    assert mascara_operador_orden("order", pares_desc, pares_desc, pares_asc, 3).tolist() == [True, False, False, False]
+    assert mascara_operador_orden("order_most", pares_desc, pares_desc, pares_asc, 3).tolist() == [True, True, True, False]
+    assert mascara_operador_orden("order_less", pares_asc, pares_desc, pares_asc, 3).tolist() == [False, False, False, True]
+
+def test_mascara_between_y_comparaciones():
+    conteo = np.array([0, 1, 2, 3])
+    args = (conteo, conteo, conteo, 3)
+    assert mascara_operador_orden("between", *args, 1, 2).tolist() == [False, True, True, False]
+    assert mascara_operador_orden("between", *args, 1, 2, False, False).tolist() == [False, False, False, False]
+    assert mascara_operador_orden("between", *args, 1, 3, False, True).tolist() == [False, False, True, True]
+    assert mascara_operador_orden("not_between", *args, 1, 2).tolist() == [True, False, False, True]
+    assert mascara_operador_orden("gt", *args, None, 1).tolist() == [False, False, True, True]
+    assert mascara_operador_orden(None, *args).tolist() == [False, False, False, False]
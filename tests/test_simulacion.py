@@ -0,0 +1,71 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+import main
+from simulacion import acumular_alerta, comparar_alertas
+
+CLAVE_1 = (7, "BTCUSDT", "1h", "2024-01-01 00:00:00")
+CLAVE_2 = (7, "BTCUSDT", "1h", "2024-01-01 01:00:00")
+
+def construir(filas):
+    alertas = {}
+    for clave, id_rango, puntos_long, puntos_short in filas:
+        acumular_alerta(alertas, clave, id_rango, puntos_long, puntos_short)
+    return alertas
+
+def test_acumular_agrupa_filas_de_la_misma_clave():
+    alertas = construir([(CLAVE_1, 1, 5.0, None), (CLAVE_1, "2", None, 3.0), (CLAVE_2, 1, 5.0, 0.0)])
+    assert alertas[CLAVE_1] == [{"1", "2"}, 5.0, 3.0, 2]
+    assert alertas[CLAVE_2] == [{"1"}, 5.0, 0.0, 1]
+
+def test_comparar_agregadas_y_eliminadas():
+    resumen = comparar_alertas(construir([(CLAVE_1, 1, 5.0, 0.0)]), construir([(CLAVE_2, 1, 0.0, 2.0)]))
+    item = resumen[(7, "BTCUSDT")]
+    assert (item["agregadas"], item["eliminadas"], item["cambiadas"], item["puntos_cambiados"]) == (1, 1, 0, 0)
+    assert item["delta_long"] == pytest.approx(5.0)
+    assert item["delta_short"] == pytest.approx(-2.0)
+
+def test_comparar_rango_cambiado():
+    resumen = comparar_alertas(construir([(CLAVE_1, 2, 5.0, 0.0)]), construir([(CLAVE_1, 1, 5.0, 0.0)]))
+    item = resumen[(7, "BTCUSDT")]
+    assert (item["agregadas"], item["eliminadas"], item["cambiadas"], item["puntos_cambiados"]) == (0, 0, 1, 0)
+
+def test_comparar_solo_puntos_cambiados():
+    # Mismo rango con otro porcentaje_puntos_base; diferencias bajo la tolerancia no cuentan
+    resumen = comparar_alertas(
+        construir([(CLAVE_1, 1, 7.5, 0.0), (CLAVE_2, 1, 5.0 + 1e-9, 0.0)]),
+        construir([(CLAVE_1, 1, 5.0, 0.0), (CLAVE_2, 1, 5.0, 0.0)]),
+    )
+    item = resumen[(7, "BTCUSDT")]
+    assert (item["agregadas"], item["eliminadas"], item["cambiadas"], item["puntos_cambiados"]) == (0, 0, 0, 1)
+    assert item["delta_long"] == pytest.approx(2.5)
+
+def test_comparar_clave_con_varias_filas_almacenadas():
+    # Una ejecución anterior dejó dos rangos para la misma clave; el candidato solo produce uno
+    resumen = comparar_alertas(
+        construir([(CLAVE_1, 1, 5.0, 0.0)]),
+        construir([(CLAVE_1, 1, 5.0, 0.0), (CLAVE_1, 2, 0.0, 3.0)]),
+    )
+    item = resumen[(7, "BTCUSDT")]
+    assert (item["multiples"], item["cambiadas"], item["puntos_cambiados"]) == (1, 1, 0)
+    assert item["delta_short"] == pytest.approx(-3.0)
+
+def test_copia_local_de_indicadores_expira_o_se_refresca(tmp_path, monkeypatch):
+    consultas = []
+    def cargar_indicadores(ticker, fecha_ini, fecha_fin):
+        consultas.append(ticker)
+        return pd.DataFrame({"rsi": [float(len(consultas))]})
+    monkeypatch.setattr(main, "cargar_indicadores", cargar_indicadores)
+    monkeypatch.setattr(main, "CACHE_INDICADORES_DIR", str(tmp_path))
+
+    assert main.cargar_indicadores_cacheado("BTC/USDT", "2024-01-01", "2024-01-31")["rsi"].iloc[0] == 1.0
+    assert main.cargar_indicadores_cacheado("BTC/USDT", "2024-01-01", "2024-01-31")["rsi"].iloc[0] == 1.0
+    assert main.cargar_indicadores_cacheado("BTC/USDT", "2024-01-01", "2024-01-31", refrescar=True)["rsi"].iloc[0] == 2.0
+    (ruta,) = tmp_path.iterdir()
+    antigua = time.time() - (main.CACHE_INDICADORES_TTL_HORAS + 1) * 3600
+    os.utime(ruta, (antigua, antigua))
+    assert main.cargar_indicadores_cacheado("BTC/USDT", "2024-01-01", "2024-01-31")["rsi"].iloc[0] == 3.0
+    assert len(consultas) == 3
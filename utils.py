@@ -1,5 +1,6 @@
 import operator
 import re
+import numpy as np
 import pandas as pd
 from db_connect import get_connection, fetchall_dict
 
@@ -35,6 +36,8 @@ FUNCIONES_OPERADOR = {
     "custom": None,
 }
 
+OPERADORES_ORDEN = ["order", "order_most", "order_less"]
+
 OPERADOR_TO_PYTHON, PYTHON_TO_DESC = cargar_operadores_bd()
 
 def aplicar_operador(valor, operador, limite_inferior=None, limite_superior=None, valores=None):
@@ -51,7 +54,7 @@ def aplicar_operador(valor, operador, limite_inferior=None, limite_superior=None
     func = FUNCIONES_OPERADOR.get(op_python)
     if not func:
         return False
-    if op_python in ["order", "order_most", "order_less"]:
+    if op_python in OPERADORES_ORDEN:
         if valores is not None:
             return func(valores)
         return False
@@ -65,6 +68,59 @@ def aplicar_operador(valor, operador, limite_inferior=None, limite_superior=None
         return func(valor, limite_superior if limite_superior is not None else limite_inferior)
     return False
 
+def resolver_operador(operador):
+    """
+    Devuelve el operador_python de un operador de rango: primero según el mapping de BD
+    y, si no está, por nombre normalizado (p.ej. "NOT BETWEEN" -> "not_between").
+    """
+    op_python = OPERADOR_TO_PYTHON.get(operador)
+    if op_python:
+        return op_python
+    normalizado = (operador or "").strip().lower().replace(" ", "_")
+    return normalizado if normalizado in FUNCIONES_OPERADOR else None
+
+def contar_pares_ordenados(matriz):
+    """
+    Kernel vectorizado para criterios de orden.
+    - matriz: array (filas, campos) con los valores de los indicadores en el orden del criterio (NULL = NaN)
+    Devuelve (pares_desc, pares_asc, validos): por fila, cantidad de pares adyacentes con valores[i] > valores[i+1],
+    cantidad con valores[i] < valores[i+1], y máscara de filas sin NULLs.
+    """
+    validos = ~np.isnan(matriz).any(axis=1)
+    diferencias = np.diff(matriz, axis=1)
+    pares_desc = (diferencias < 0).sum(axis=1)
+    pares_asc = (diferencias > 0).sum(axis=1)
+    return pares_desc, pares_asc, validos
+
+def mascara_operador_orden(op_python, conteo, pares_desc, pares_asc, n_pares,
+                           limite_inferior=None, limite_superior=None, incluye_inf=True, incluye_sup=True):
+    """
+    Aplica un operador de rango sobre los conteos de pares ordenados, fila a fila.
+    - order / order_most / order_less: misma semántica que FUNCIONES_OPERADOR, sobre todos los campos
+    - between / not_between: sobre conteo (pares en la dirección del criterio), respetando límites incluidos
+    - gt, ge, lt, le, eq, ne: conteo contra el límite (superior si existe, si no inferior)
+    Devuelve una máscara booleana (filas); operadores no soportados no marcan ninguna fila.
+    """
+    if op_python == "order":
+        return pares_desc == n_pares
+    if op_python == "order_most":
+        return pares_desc >= n_pares // 2
+    if op_python == "order_less":
+        return pares_asc == n_pares
+    if op_python in ["between", "not_between"]:
+        if limite_inferior is None or limite_superior is None:
+            return np.zeros(len(conteo), dtype=bool)
+        sobre_inf = conteo >= limite_inferior if incluye_inf else conteo > limite_inferior
+        bajo_sup = conteo <= limite_superior if incluye_sup else conteo < limite_superior
+        dentro = sobre_inf & bajo_sup
+        return dentro if op_python == "between" else ~dentro
+    if op_python in ["gt", "ge", "lt", "le", "eq", "ne"]:
+        limite = limite_superior if limite_superior is not None else limite_inferior
+        if limite is None:
+            return np.zeros(len(conteo), dtype=bool)
+        return FUNCIONES_OPERADOR[op_python](conteo, limite)
+    return np.zeros(len(conteo), dtype=bool)
+
 def mostrar_operadores_disponibles():
     print("Operadores cargados desde BD:")
     for op, py in OPERADOR_TO_PYTHON.items():